@@ -1,5 +1,8 @@
 """Analyze video frames for embedded media using a Vision Language Model."""
 
+import asyncio
+import functools
+import hashlib
 import json
 import os
 import sys
@@ -13,6 +16,14 @@ from tqdm import tqdm
 load_dotenv()
 
 DEFAULT_MODEL = "gemini-2.5-flash-lite"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 1
+REQUEST_TIMEOUT_MS = 30_000
+PROGRESS_MIN_FRAMES = 10
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "instarec", "vlm")
+
+# In-process layer over the on-disk cache, keyed by (namespace, frame hash)
+_memory_cache: dict[tuple[str, str], dict[str, Any]] = {}
 
 SYSTEM_PROMPT = """\
 You are analyzing an image frame. This image may or may not contain an embedded card.
@@ -38,52 +49,147 @@ Respond ONLY as valid JSON matching this schema:
 } | null
 """
 
+SYSTEM_PROMPT_BATCH = """\
+You are analyzing {count} image frames, each preceded by its frame number.
+Each image may or may not contain an embedded card.
+For EACH frame independently, determine whether it contains any embedded or
+referenced media (e.g., music players, video players, books, etc).
+
+If yes, extract:
+- media type (music, video, article, book)
+- platform (spotify, youtube, apple_music, etc.)
+- title
+- creator/artist/channel
+- confidence (0-1)
+
+If no, return null for the media field.
 
+Respond ONLY as a valid JSON array with exactly {count} objects, one per frame
+in frame order, each matching this schema:
+{{"media": {{
+    "type": string | null,
+    "platform": string | null,
+    "title": string | null,
+    "creator": string | null,
+    "confidence": number | null
+}} | null}}
+"""
+
+_NULLABLE_STRING = types.Schema(type=types.Type.STRING, nullable=True)
+
+MEDIA_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "media": types.Schema(
+            type=types.Type.OBJECT,
+            nullable=True,
+            properties={
+                "type": _NULLABLE_STRING,
+                "platform": _NULLABLE_STRING,
+                "title": _NULLABLE_STRING,
+                "creator": _NULLABLE_STRING,
+                "confidence": types.Schema(type=types.Type.NUMBER, nullable=True),
+            },
+            required=["type", "platform", "title", "creator", "confidence"],
+        ),
+    },
+    required=["media"],
+)
+
+# Structured output: the model is constrained to emit JSON matching the schema
+_FRAME_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=MEDIA_SCHEMA,
+)
+_BATCH_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=types.Schema(type=types.Type.ARRAY, items=MEDIA_SCHEMA),
+)
+
+# Part of every cache namespace, so editing a prompt or the schema starts afresh
+_PROMPT_DIGEST = hashlib.blake2b(
+    "\0".join(
+        [
+            SYSTEM_PROMPT,
+            SYSTEM_PROMPT_BATCH,
+            MEDIA_SCHEMA.model_dump_json(exclude_none=True),
+        ]
+    ).encode(),
+    digest_size=4,
+).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
 def _get_client() -> genai.Client:
-    """Return a configured Gemini client or raise."""
+    """Return the process-wide Gemini client, or raise if no key is set.
+
+    The client is cached so every request reuses its pooled HTTP connections
+    instead of paying a new TCP/TLS handshake.
+    """
     key = os.environ.get("GEMINI_API_KEY", "")
     if not key:
         raise RuntimeError("GEMINI_API_KEY is not set. Add it to your .env file.")
-    return genai.Client(api_key=key)
+    return genai.Client(
+        api_key=key,
+        http_options=types.HttpOptions(timeout=REQUEST_TIMEOUT_MS),
+    )
 
 
-def _load_image_bytes(path: str) -> bytes:
-    """Read an image file and return its raw bytes."""
-    with open(path, "rb") as f:
-        return f.read()
+def _image_part(data: bytes) -> types.Part:
+    """Wrap JPEG bytes in an inline-data request part without copying them."""
+    return types.Part(inline_data=types.Blob(data=data, mime_type="image/jpeg"))
 
 
-def analyze_frame(image_path: str, model: str = DEFAULT_MODEL) -> dict[str, Any]:
-    """Send a single frame to the VLM and return parsed JSON.
+def _frame_hash(data: bytes) -> str:
+    """Return an exact content hash of the encoded frame bytes."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
 
-    Args:
-        image_path: Path to a JPEG/PNG frame on disk.
-        model: Gemini model identifier.
 
-    Returns:
-        Parsed JSON dict with a ``media`` key (object or null).
-    """
-    client = _get_client()
-    image_data = _load_image_bytes(image_path)
-    image_part = types.Part.from_bytes(data=image_data, mime_type="image/jpeg")
+def _cache_namespace(model: str, batch_size: int = 1) -> str:
+    """Return the cache namespace for a model, prompt version and batch size."""
+    namespace = f"{model}-{_PROMPT_DIGEST}"
+    return namespace if batch_size == 1 else f"{namespace}@batch{batch_size}"
 
-    response = client.models.generate_content(
-        model=model,
-        contents=[SYSTEM_PROMPT, image_part],
-    )
 
-    raw = response.text or ""
+def _cache_path(namespace: str, frame_hash: str) -> str:
+    """Return the on-disk cache location for a namespace/frame pair."""
+    return os.path.join(CACHE_DIR, namespace, f"{frame_hash}.json")
 
-    # Strip markdown code fences if the model wraps its response
-    text = raw.strip()
-    if text.startswith("```"):
-        # Remove opening ```json or ``` and closing ```
-        lines = text.split("\n")
-        lines = [line for line in lines if not line.strip().startswith("```")]
-        text = "\n".join(lines)
+
+def _cache_load(namespace: str, frame_hash: str) -> dict[str, Any] | None:
+    """Return a cached VLM result, or None on a miss."""
+    key = (namespace, frame_hash)
+    if key in _memory_cache:
+        return _memory_cache[key]
 
     try:
-        parsed = json.loads(text)
+        with open(_cache_path(namespace, frame_hash)) as f:
+            result = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if not isinstance(result, dict):
+        return None
+    _memory_cache[key] = result
+    return result
+
+
+def _cache_store(namespace: str, frame_hash: str, result: dict[str, Any]) -> None:
+    """Persist a VLM result; unparseable responses are never cached."""
+    if "_error" in result:
+        return
+
+    _memory_cache[(namespace, frame_hash)] = result
+    path = _cache_path(namespace, frame_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f)
+
+
+def _parse_response(raw: str) -> dict[str, Any]:
+    """Parse a raw VLM response into a dict with a ``media`` key."""
+    try:
+        parsed = json.loads(raw)
         if not isinstance(parsed, dict):
             return {"media": None}
         if "media" not in parsed:
@@ -97,25 +203,240 @@ def analyze_frame(image_path: str, model: str = DEFAULT_MODEL) -> dict[str, Any]
         }
 
 
+def _request_error(exc: Exception) -> dict[str, Any]:
+    """Return the uncached result recorded for a frame whose request failed."""
+    return {"media": None, "_error": f"VLM request failed: {exc}"}
+
+
+def _parse_batch_response(raw: str, count: int) -> list[dict[str, Any]] | None:
+    """Parse a batched VLM response, or return None if its shape is wrong."""
+    try:
+        parsed = json.loads(raw)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+    if not isinstance(parsed, list) or len(parsed) != count:
+        return None
+    return [
+        item if isinstance(item, dict) and "media" in item else {"media": None}
+        for item in parsed
+    ]
+
+
+def analyze_frame(
+    image_path: str,
+    model: str = DEFAULT_MODEL,
+    client: genai.Client | None = None,
+    use_cache: bool = True,
+) -> dict[str, Any]:
+    """Send a single frame to the VLM and return parsed JSON.
+
+    Args:
+        image_path: Path to a JPEG/PNG frame on disk.
+        model: Gemini model identifier.
+        client: Gemini client to use; defaults to the shared process-wide one.
+        use_cache: Reuse and store responses in the on-disk frame cache.
+
+    Returns:
+        Parsed JSON dict with a ``media`` key (object or null).
+    """
+    # Unbuffered single read: the bytes handed to the SDK are the only copy
+    with open(image_path, "rb", buffering=0) as f:
+        image_data = f.readall()
+    frame_hash = _frame_hash(image_data)
+    namespace = _cache_namespace(model)
+    if use_cache:
+        cached = _cache_load(namespace, frame_hash)
+        if cached is not None:
+            return cached
+
+    client = client or _get_client()
+    response = client.models.generate_content(
+        model=model,
+        contents=[SYSTEM_PROMPT, _image_part(image_data)],
+        config=_FRAME_CONFIG,
+    )
+
+    result = _parse_response(response.text or "")
+    if use_cache:
+        _cache_store(namespace, frame_hash, result)
+    return result
+
+
+async def _analyze_frame_async(
+    client: genai.Client,
+    frame: bytes,
+    model: str,
+    sem: asyncio.Semaphore,
+) -> dict[str, Any]:
+    """Async variant of :func:`analyze_frame` for in-memory JPEG bytes."""
+    async with sem:
+        try:
+            response = await client.aio.models.generate_content(
+                model=model,
+                contents=[SYSTEM_PROMPT, _image_part(frame)],
+                config=_FRAME_CONFIG,
+            )
+        except Exception as exc:
+            return _request_error(exc)
+
+    return _parse_response(response.text or "")
+
+
+async def _analyze_batch_async(
+    client: genai.Client,
+    frames: list[bytes],
+    model: str,
+    sem: asyncio.Semaphore,
+) -> list[dict[str, Any]]:
+    """Analyze several frames in a single request, bounded by *sem*.
+
+    Falls back to one request per frame if the response is not a JSON array
+    with one entry per frame. If the request itself fails, every frame in the
+    batch gets an error result instead.
+    """
+    if len(frames) == 1:
+        return [await _analyze_frame_async(client, frames[0], model, sem)]
+
+    async with sem:
+        contents: list[Any] = [SYSTEM_PROMPT_BATCH.format(count=len(frames))]
+        for number, frame in enumerate(frames, start=1):
+            contents += [f"Frame {number}:", _image_part(frame)]
+        try:
+            response = await client.aio.models.generate_content(
+                model=model,
+                contents=contents,
+                config=_BATCH_CONFIG,
+            )
+        except Exception as exc:
+            return [_request_error(exc) for _ in frames]
+
+    results = _parse_batch_response(response.text or "", len(frames))
+    if results is not None:
+        return results
+
+    return list(
+        await asyncio.gather(
+            *(_analyze_frame_async(client, frame, model, sem) for frame in frames)
+        )
+    )
+
+
+async def _gather(
+    client: genai.Client,
+    pending: dict[str, bytes],
+    model: str,
+    concurrency: int,
+    batch_size: int,
+    namespace: str | None,
+) -> dict[str, dict[str, Any]]:
+    """Analyze frames concurrently, returning results keyed by frame hash.
+
+    Each result is cached under *namespace* (unless it is None) as soon as its
+    request completes, so an interrupted run keeps what it already paid for.
+    """
+    hashes = list(pending)
+    frames = list(pending.values())
+    sem = asyncio.Semaphore(concurrency)
+
+    async def run(start: int) -> tuple[int, list[dict[str, Any]]]:
+        batch = frames[start : start + batch_size]
+        return start, await _analyze_batch_async(client, batch, model, sem)
+
+    tasks = [
+        asyncio.create_task(run(start)) for start in range(0, len(frames), batch_size)
+    ]
+    results: dict[str, dict[str, Any]] = {}
+
+    # Redraw at most every 0.5s / 5% of frames; skip the bar for small reels
+    with tqdm(
+        total=len(frames),
+        desc="Analyzing frames",
+        unit="frame",
+        file=sys.stderr,
+        disable=len(frames) < PROGRESS_MIN_FRAMES,
+        mininterval=0.5,
+        miniters=max(1, len(frames) // 20),
+        smoothing=0,
+    ) as progress:
+        for next_done in asyncio.as_completed(tasks):
+            start, batch_results = await next_done
+            for frame_hash, result in zip(hashes[start:], batch_results):
+                results[frame_hash] = result
+                if namespace is not None:
+                    _cache_store(namespace, frame_hash, result)
+            progress.update(len(batch_results))
+
+    return results
+
+
 def analyze_frames(
-    frame_paths: list[str], model: str = DEFAULT_MODEL
+    frames: list[bytes],
+    model: str = DEFAULT_MODEL,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    use_cache: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
 ) -> list[dict[str, Any]]:
     """Analyze multiple frames and return results for those with embedded media.
 
+    Byte-identical frames are sent once, and responses are cached on disk
+    under ``CACHE_DIR`` keyed by a content hash of the frame, separately per
+    model, prompt version and batch size.
+    Remaining requests are dispatched concurrently, with at most *concurrency*
+    in flight, each carrying up to *batch_size* frames. A failed request does
+    not abort the run: its frames are reported as failed and left uncached.
+
     Args:
-        frame_paths: List of paths to frame images.
+        frames: JPEG-encoded frames, as returned by
+            :func:`instarec.frames.extract_unique_frames`.
         model: Gemini model identifier.
+        concurrency: Maximum number of VLM requests in flight at once.
+        use_cache: Reuse and store responses in the on-disk frame cache.
+        batch_size: Frames sent per request. Batches whose response does not
+            match the frame count are retried one frame per request.
 
     Returns:
-        List of result dicts (one per frame that contains embedded media).
+        List of result dicts (one per distinct frame that contains embedded
+        media), in frame order.
     """
-    results: list[dict[str, Any]] = []
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
 
-    for path in tqdm(
-        frame_paths, desc="Analyzing frames", unit="frame", file=sys.stderr
-    ):
-        result: dict[str, Any] = analyze_frame(path, model=model) or {"media": None}
-        if result.get("media"):
-            results.append(result)
+    unique: dict[str, bytes] = {}
+    for frame in frames:
+        unique.setdefault(_frame_hash(frame), frame)
 
-    return results
+    namespace = _cache_namespace(model, batch_size)
+    results: dict[str, dict[str, Any]] = {}
+    pending: dict[str, bytes] = {}
+    for frame_hash, frame in unique.items():
+        cached = _cache_load(namespace, frame_hash) if use_cache else None
+        if cached is None:
+            pending[frame_hash] = frame
+        else:
+            results[frame_hash] = cached
+
+    if pending:
+        client = _get_client()
+        fresh = asyncio.run(
+            _gather(
+                client,
+                pending,
+                model,
+                concurrency,
+                batch_size,
+                namespace if use_cache else None,
+            )
+        )
+        results.update(fresh)
+
+        failed = sum("_error" in result for result in fresh.values())
+        if failed:
+            print(
+                f"[-] {failed} frame(s) could not be analyzed; rerun to retry them",
+                file=sys.stderr,
+            )
+
+    return [results[h] for h in unique if results[h].get("media")]
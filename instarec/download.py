@@ -1,15 +1,34 @@
 """Download Instagram reels via yt-dlp."""
 
 import os
+import shutil
 from typing import Any
 
 from yt_dlp import YoutubeDL
+from yt_dlp.extractor.instagram import InstagramIE
+
+DEFAULT_JOBS = 4
+
+
+def parse_reel_id(url: str) -> str:
+    """Return the ID yt-dlp assigns a reel, read offline from its URL.
+
+    Args:
+        url: Instagram reel or post URL (``/reel/``, ``/reels/`` or ``/p/``).
+
+    Returns:
+        The reel's shortcode, or an empty string if *url* is not recognised.
+    """
+    if not InstagramIE.suitable(url):
+        return ""
+    return InstagramIE._match_id(url)
 
 
 def download_reel(
     url: str,
     output_dir: str = ".",
     cookies_file: str = "cookies.txt",
+    jobs: int = DEFAULT_JOBS,
 ) -> dict[str, Any]:
     """Download an Instagram reel and return its metadata.
 
@@ -17,6 +36,8 @@ def download_reel(
         url: Instagram reel URL.
         output_dir: Directory to save the video into.
         cookies_file: Path to yt-dlp cookies file for authentication.
+        jobs: Parallel connections: concurrent DASH fragments, and aria2c
+            connections per file when aria2c is installed.
 
     Returns:
         Dict with keys ``video_path`` (str), ``caption`` (str), and ``id`` (str).
@@ -25,9 +46,10 @@ def download_reel(
     video_template = os.path.join(output_dir, "video.%(ext)s")
 
     ydl_opts: dict[str, Any] = {
-        "cookies": cookies_file,
         "outtmpl": video_template,
-        "format": "best",
+        # Instagram almost always serves MP4, so prefer it; the remuxer below
+        # leaves an MP4 download untouched and only rewraps anything else
+        "format": "best[ext=mp4]/best",
         "postprocessors": [
             {
                 "key": "FFmpegVideoRemuxer",
@@ -36,8 +58,19 @@ def download_reel(
         ],
         "quiet": True,
         "no_warnings": True,
+        "concurrent_fragment_downloads": jobs,
     }
 
+    # yt-dlp writes the jar back on exit, so only point it at an existing file
+    if os.path.exists(cookies_file):
+        ydl_opts["cookiefile"] = cookies_file
+
+    if shutil.which("aria2c"):
+        ydl_opts["external_downloader"] = {"default": "aria2c"}
+        ydl_opts["external_downloader_args"] = {
+            "aria2c": ["-x", str(jobs), "-s", str(jobs), "-k", "1M"],
+        }
+
     with YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=True)
 
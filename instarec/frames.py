@@ -1,55 +1,185 @@
 """Extract unique frames from a video using scene detection."""
 
+import glob
 import os
-import shutil
 import subprocess
-import tempfile
 
+import cv2
+import numpy as np
+
+DEFAULT_SCENE_THRESHOLD = 0.05
+
+JPEG_QUALITY = 90
+SAD_STRIDE = 8  # luma is subsampled this much per axis before differencing
+SAD_BATCH = 8  # frames scored per vectorized call
+_JPEG_EOI = b"\xff\xd9"
+
+
+def _encode_jpeg(frame: np.ndarray) -> bytes:
+    """Encode a BGR frame as JPEG bytes."""
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise RuntimeError("Failed to encode frame as JPEG")
+    return buf.tobytes()
+
+
+def _luma(frame: np.ndarray) -> np.ndarray:
+    """Return the subsampled luma plane of a BGR frame.
+
+    Subsampling before the color conversion keeps the per-frame cost
+    proportional to the small plane, not the full frame.
+    """
+    small = np.ascontiguousarray(frame[::SAD_STRIDE, ::SAD_STRIDE])
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def _scene_scores(
+    lumas: list[np.ndarray],
+    prev: np.ndarray | None,
+    prev_mafd: float,
+) -> tuple[np.ndarray, float]:
+    """Score consecutive luma planes against their predecessors in one pass.
+
+    Uses the formula of ffmpeg's ``select`` scene score: with ``mafd`` the mean
+    absolute frame difference, the score is ``min(mafd, |mafd - prev_mafd|)``
+    / 100, clipped to 0-1. Differencing against the previous ``mafd`` keeps
+    sustained motion (pans, handheld shake) from scoring as a cut. The first
+    plane of the video (no *prev*) always scores 1.
+
+    Returns the scores and the last ``mafd``, to carry into the next batch.
+    """
+    planes = lumas if prev is None else [prev, *lumas]
+    stack = np.stack(planes).astype(np.int16)
+    mafd = np.abs(np.diff(stack, axis=0)).mean(axis=(1, 2))
+    prev_mafds = np.concatenate(([prev_mafd], mafd))[:-1]
+    scores = np.clip(np.minimum(mafd, np.abs(mafd - prev_mafds)) / 100, 0, 1)
+    if prev is None:
+        scores = np.concatenate(([1.0], scores))
+
+    last_mafd = float(mafd[-1]) if len(mafd) else prev_mafd
+    return scores, last_mafd
+
+
+def _decode_scene_frames(video_path: str, scene_threshold: float) -> list[bytes]:
+    """Decode the video in-process and keep frames that start a new scene.
+
+    Frames are scored with ffmpeg's scene formula (see :func:`_scene_scores`),
+    computed on subsampled luma only, for ``SAD_BATCH`` frames at a time. Only
+    kept frames are JPEG-encoded; the first frame is always kept.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video: {video_path}")
+
+    frames: list[bytes] = []
+    prev: np.ndarray | None = None
+    prev_mafd = 0.0
+    batch: list[np.ndarray] = []
+    lumas: list[np.ndarray] = []
+    try:
+        while True:
+            ok, frame = cap.read()
+            if ok:
+                batch.append(frame)
+                lumas.append(_luma(frame))
+            if lumas and (not ok or len(lumas) == SAD_BATCH):
+                scores, prev_mafd = _scene_scores(lumas, prev, prev_mafd)
+                frames += [
+                    _encode_jpeg(kept)
+                    for kept, score in zip(batch, scores)
+                    if score > scene_threshold
+                ]
+                prev = lumas[-1]
+                batch, lumas = [], []
+            if not ok:
+                break
+    finally:
+        cap.release()
+
+    return frames
+
+
+def _decode_keyframes(video_path: str, scene_threshold: float | None) -> list[bytes]:
+    """Have ffmpeg decode keyframes only and pipe them back as JPEG bytes."""
+    filters = ["mpdecimate", "setpts=N/FRAME_RATE/TB"]
+    if scene_threshold is not None:
+        filters.insert(0, f"select='gt(scene,{scene_threshold})'")
 
-def extract_scene_frames(video_path: str, out_dir: str, scene_threshold: float) -> None:
-    """Run ffmpeg scene-change detection and write raw frames to *out_dir*."""
     cmd = [
         "ffmpeg",
+        "-skip_frame",
+        "nokey",
         "-i",
         video_path,
         "-vf",
-        f"select='gt(scene,{scene_threshold})'",
+        ",".join(filters),
         "-vsync",
         "vfr",
-        os.path.join(out_dir, "frame_%04d.jpg"),
+        "-f",
+        "image2pipe",
+        "-c:v",
+        "mjpeg",
+        "-q:v",
+        "2",
+        "pipe:1",
     ]
-    subprocess.run(
-        cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    proc = subprocess.run(
+        cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
     )
 
+    # The mjpeg encoder byte-stuffs entropy-coded data, so EOI only ever
+    # appears at the end of each image
+    return [chunk + _JPEG_EOI for chunk in proc.stdout.split(_JPEG_EOI) if chunk]
+
 
 def extract_unique_frames(
     video_path: str,
-    output_dir: str = "frames",
-    scene_threshold: float = 0.05,
-) -> list[str]:
-    """Extract scene-change frames from a video.
+    scene_threshold: float | None = DEFAULT_SCENE_THRESHOLD,
+    fast: bool = False,
+) -> list[bytes]:
+    """Extract scene-change frames from a video into memory.
 
     Args:
         video_path: Path to MP4 file.
-        output_dir: Directory to write frames into.
-        scene_threshold: FFmpeg scene-change sensitivity (0-1, lower = more frames).
+        scene_threshold: Scene-change sensitivity (0-1, lower = more frames).
+            May be None in *fast* mode to keep every keyframe.
+        fast: Decode keyframes only. For Instagram reels (H.264, ~1s GOP) this
+            yields roughly one frame per second at a fraction of the decode cost.
 
     Returns:
-        Sorted list of paths to the extracted frames.
+        JPEG-encoded frames in video order.
     """
     if not os.path.exists(video_path):
         raise FileNotFoundError(video_path)
 
-    with tempfile.TemporaryDirectory() as tmp:
-        extract_scene_frames(video_path, tmp, scene_threshold)
+    if fast:
+        return _decode_keyframes(video_path, scene_threshold)
+    if scene_threshold is None:
+        raise ValueError("scene_threshold is required unless fast=True")
+    return _decode_scene_frames(video_path, scene_threshold)
+
+
+def save_frames(frames: list[bytes], output_dir: str = "frames") -> list[str]:
+    """Write JPEG-encoded frames to *output_dir* as ``frame_NNNN.jpg``.
+
+    Args:
+        frames: JPEG-encoded frames, as returned by :func:`extract_unique_frames`.
+        output_dir: Directory to write frames into.
+
+    Returns:
+        Sorted list of paths to the written frames.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Frames left over from a previous run would otherwise mix with these
+    for stale in glob.glob(os.path.join(output_dir, "frame_*.jpg")):
+        os.remove(stale)
 
-        os.makedirs(output_dir, exist_ok=True)
-        kept: list[str] = []
-        for fname in sorted(os.listdir(tmp)):
-            src = os.path.join(tmp, fname)
-            dest = os.path.join(output_dir, fname)
-            shutil.copy(src, dest)
-            kept.append(dest)
+    paths: list[str] = []
+    for number, data in enumerate(frames, start=1):
+        path = os.path.join(output_dir, f"frame_{number:04d}.jpg")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
 
-    return kept
+    return paths
@@ -10,10 +10,19 @@ import os
 import shutil
 import sys
 import tempfile
+import time
 
+from instarec.analyze import DEFAULT_BATCH_SIZE
+from instarec.analyze import DEFAULT_CONCURRENCY
 from instarec.analyze import analyze_frames
+from instarec.download import DEFAULT_JOBS
 from instarec.download import download_reel
+from instarec.download import parse_reel_id
+from instarec.frames import DEFAULT_SCENE_THRESHOLD
 from instarec.frames import extract_unique_frames
+from instarec.frames import save_frames
+
+DEFAULT_CACHE_DAYS = 7.0
 
 
 def log(msg: str) -> None:
@@ -32,6 +41,15 @@ def main() -> None:
         default="cookies.txt",
         help="Path to yt-dlp cookies file (default: cookies.txt)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=(
+            "Parallel download connections (fragments, or aria2c if installed) "
+            f"(default: {DEFAULT_JOBS})"
+        ),
+    )
     parser.add_argument(
         "--model",
         default="gemini-2.5-flash-lite",
@@ -40,8 +58,48 @@ def main() -> None:
     parser.add_argument(
         "--scene-threshold",
         type=float,
-        default=0.05,
-        help="FFmpeg scene-change threshold, 0-1 (default: 0.05)",
+        default=None,
+        help=(
+            "Scene-change threshold, 0-1 "
+            f"(default: {DEFAULT_SCENE_THRESHOLD}; unset with --fast-keyframes)"
+        ),
+    )
+    parser.add_argument(
+        "--fast-keyframes",
+        action="store_true",
+        help="Decode keyframes only for a fast first pass (~1 frame/sec on reels)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=(
+            "Maximum number of VLM requests in flight at once "
+            f"(default: {DEFAULT_CONCURRENCY})"
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=(
+            "Frames sent to the VLM per request, e.g. 4-8 "
+            f"(default: {DEFAULT_BATCH_SIZE})"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and do not update the on-disk VLM response and result caches",
+    )
+    parser.add_argument(
+        "--cache-days",
+        type=float,
+        default=DEFAULT_CACHE_DAYS,
+        help=(
+            "Reuse data/<reel_id>/result.json from a --keep-files run if younger "
+            f"than this many days, 0 to always rerun (default: {DEFAULT_CACHE_DAYS:g})"
+        ),
     )
     parser.add_argument(
         "--keep-files",
@@ -51,17 +109,70 @@ def main() -> None:
 
     args = parser.parse_args()
 
-    if args.keep_files:
-        with tempfile.TemporaryDirectory(prefix="instarec_") as tmp:
-            output = _run_pipeline(args, tmp_dir=tmp, keep_files=True)
-    else:
-        with tempfile.TemporaryDirectory(prefix="instarec_") as tmp:
-            output = _run_pipeline(args, tmp_dir=tmp, keep_files=False)
+    if args.scene_threshold is None and not args.fast_keyframes:
+        args.scene_threshold = DEFAULT_SCENE_THRESHOLD
+
+    if not 1 <= args.jobs <= 16:
+        parser.error("--jobs must be between 1 and 16")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    # Earlier --keep-files runs save their result in data/<reel_id>/; the ID is
+    # the URL shortcode, so checking for one costs no request to Instagram
+    output = None
+    reel_id = parse_reel_id(args.url)
+    if reel_id and not args.no_cache and args.cache_days > 0:
+        result_path = os.path.join("data", reel_id, "result.json")
+        output = _load_cached_result(
+            result_path,
+            settings=_result_settings(args),
+            max_age_days=args.cache_days,
+        )
+        if output is not None:
+            log(f"[+] Using cached result from {result_path}")
+            output["url"] = args.url
+
+    if output is None:
+        if args.keep_files:
+            with tempfile.TemporaryDirectory(prefix="instarec_") as tmp:
+                output = _run_pipeline(args, tmp_dir=tmp, keep_files=True)
+        else:
+            with tempfile.TemporaryDirectory(prefix="instarec_") as tmp:
+                output = _run_pipeline(args, tmp_dir=tmp, keep_files=False)
 
     json.dump(output, sys.stdout, indent=2)
     print(file=sys.stdout)  # trailing newline
 
 
+def _result_settings(args: argparse.Namespace) -> dict:
+    """Return the options that shape a pipeline result, for cache validation."""
+    return {
+        "model": args.model,
+        "scene_threshold": args.scene_threshold,
+        "fast_keyframes": args.fast_keyframes,
+        "batch_size": args.batch_size,
+    }
+
+
+def _load_cached_result(path: str, settings: dict, max_age_days: float) -> dict | None:
+    """Return a previous pipeline result if it is fresh and used *settings*."""
+    try:
+        age_days = (time.time() - os.path.getmtime(path)) / 86400
+        if age_days >= max_age_days:
+            return None
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if not isinstance(cached, dict) or cached.get("settings") != settings:
+        return None
+    result = cached.get("result")
+    return result if isinstance(result, dict) else None
+
+
 def _run_pipeline(args: argparse.Namespace, tmp_dir: str, keep_files: bool) -> dict:
     """Execute the three pipeline stages and return the combined result."""
 
@@ -71,6 +182,7 @@ def _run_pipeline(args: argparse.Namespace, tmp_dir: str, keep_files: bool) -> d
         url=args.url,
         output_dir=tmp_dir,
         cookies_file=args.cookies,
+        jobs=args.jobs,
     )
     log(f"[+] Downloaded video to {dl['video_path']}")
 
@@ -85,40 +197,52 @@ def _run_pipeline(args: argparse.Namespace, tmp_dir: str, keep_files: bool) -> d
         shutil.move(dl["video_path"], kept_video)
         dl["video_path"] = kept_video
         log(f"[+] Saved video to {kept_video}")
-    else:
-        work_dir = tmp_dir
 
-    # Stage 2: Extract frames
+    # Stage 2: Extract frames (kept in memory, written out only with --keep-files)
     log("[*] Extracting unique frames...")
-    frames_dir = os.path.join(work_dir, "frames")
-    frame_paths = extract_unique_frames(
+    frames = extract_unique_frames(
         video_path=dl["video_path"],
-        output_dir=frames_dir,
         scene_threshold=args.scene_threshold,
+        fast=args.fast_keyframes,
     )
-    log(f"[+] Extracted {len(frame_paths)} unique frames")
+    log(f"[+] Extracted {len(frames)} unique frames")
     if keep_files:
+        frames_dir = os.path.join(work_dir, "frames")
+        save_frames(frames, frames_dir)
         log(f"[+] Saved frames to {frames_dir}")
 
-    if not frame_paths:
+    media: list = []
+    if not frames:
         log("[-] No frames extracted, nothing to analyze")
-        return {
-            "url": args.url,
-            "caption": dl["caption"],
-            "media": [],
-        }
-
-    # Stage 3: Analyze with VLM
-    log(f"[*] Analyzing {len(frame_paths)} frames with {args.model}...")
-    media = analyze_frames(frame_paths, model=args.model)
-    log(f"[+] Found embedded media in {len(media)} frame(s)")
-
-    return {
+    else:
+        # Stage 3: Analyze with VLM
+        log(f"[*] Analyzing {len(frames)} frames with {args.model}...")
+        media = analyze_frames(
+            frames,
+            model=args.model,
+            concurrency=args.concurrency,
+            use_cache=not args.no_cache,
+            batch_size=args.batch_size,
+        )
+        log(f"[+] Found embedded media in {len(media)} frame(s)")
+
+    output = {
         "url": args.url,
         "caption": dl["caption"],
         "media": media,
     }
 
+    # Saved next to the kept video and frames so later runs can reuse it
+    if keep_files and not args.no_cache:
+        result_path = os.path.join(work_dir, "result.json")
+        with open(result_path, "w") as f:
+            json.dump(
+                {"settings": _result_settings(args), "result": output}, f, indent=2
+            )
+        log(f"[+] Saved result to {result_path}")
+
+    return output
+
 
 if __name__ == "__main__":
     main()
@@ -5,8 +5,9 @@ import subprocess
 import tempfile
 import shutil
 import os
-from PIL import Image
-import imagehash
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
 
 
 def extract_scene_frames(video_path, out_dir, scene_threshold):
@@ -15,7 +16,7 @@ def extract_scene_frames(video_path, out_dir, scene_threshold):
         "-i",
         video_path,
         "-vf",
-        f"select='gt(scene,{scene_threshold})'",
+        f"select='gt(scene,{scene_threshold})',mpdecimate,setpts=N/FRAME_RATE/TB",
         "-vsync",
         "vfr",
         os.path.join(out_dir, "frame_%04d.jpg"),
@@ -25,20 +26,32 @@ def extract_scene_frames(video_path, out_dir, scene_threshold):
     )
 
 
+def dhash(path):
+    # 1/8-scale grayscale decode, then a 64-bit difference hash packed into
+    # one uint64. cv2 releases the GIL, so this parallelizes across threads.
+    gray = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return np.packbits(bits).view(np.uint64)[0]
+
+
 def dedupe_frames(in_dir, out_dir, hash_threshold):
     os.makedirs(out_dir, exist_ok=True)
 
-    hashes = []
-    kept = 0
+    fnames = sorted(os.listdir(in_dir))
+    paths = [os.path.join(in_dir, fname) for fname in fnames]
+    with ThreadPoolExecutor() as ex:
+        hashes = np.array(list(ex.map(dhash, paths)), dtype=np.uint64)
 
-    for fname in sorted(os.listdir(in_dir)):
-        path = os.path.join(in_dir, fname)
-        img = Image.open(path).convert("RGB")
-        h = imagehash.phash(img)
+    kept_hashes = np.empty(len(fnames), dtype=np.uint64)
+    kept = 0
 
-        if all(abs(h - prev) > hash_threshold for prev in hashes):
+    for fname, path, h in zip(fnames, paths, hashes):
+        # Hamming distance to every kept hash in one xor + popcount pass
+        dists = np.bitwise_count(np.bitwise_xor(kept_hashes[:kept], h))
+        if kept == 0 or dists.min() > hash_threshold:
             shutil.copy(path, os.path.join(out_dir, fname))
-            hashes.append(h)
+            kept_hashes[kept] = h
             kept += 1
 
     return kept
@@ -46,7 +59,7 @@ def dedupe_frames(in_dir, out_dir, hash_threshold):
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Extract unique frames from an MP4 using scene detection + perceptual hashing"
+        description="Extract unique frames from an MP4 using scene detection + difference hashing"
     )
     parser.add_argument("video", help="Path to MP4 file")
     parser.add_argument(
@@ -59,7 +72,7 @@ def main():
         "--hash-threshold",
         type=int,
         default=10,
-        help="Perceptual hash distance threshold (default: 10)",
+        help="Difference hash (64-bit) Hamming distance threshold (default: 10)",
     )
     parser.add_argument(
         "--output", default="frames", help="Output directory (default: unique_frames)"
@@ -0,0 +1,45 @@
+"""Parsing of batched VLM responses."""
+
+import json
+
+from instarec.analyze import _parse_batch_response
+
+MEDIA = {
+    "type": "music",
+    "platform": "spotify",
+    "title": "Song",
+    "creator": "Artist",
+    "confidence": 0.9,
+}
+
+
+def test_matching_length_is_parsed():
+    raw = json.dumps([{"media": MEDIA}, {"media": None}])
+    assert _parse_batch_response(raw, 2) == [{"media": MEDIA}, {"media": None}]
+
+
+def test_malformed_items_become_null_media():
+    raw = json.dumps([{"media": MEDIA}, "oops", {"other": 1}])
+    assert _parse_batch_response(raw, 3) == [
+        {"media": MEDIA},
+        {"media": None},
+        {"media": None},
+    ]
+
+
+def test_too_few_items_is_rejected():
+    raw = json.dumps([{"media": MEDIA}])
+    assert _parse_batch_response(raw, 2) is None
+
+
+def test_too_many_items_is_rejected():
+    raw = json.dumps([{"media": None}] * 3)
+    assert _parse_batch_response(raw, 2) is None
+
+
+def test_non_array_is_rejected():
+    assert _parse_batch_response(json.dumps({"media": MEDIA}), 1) is None
+
+
+def test_invalid_json_is_rejected():
+    assert _parse_batch_response("not json", 2) is None
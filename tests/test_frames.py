@@ -0,0 +1,67 @@
+"""Scene detection on small synthetic clips."""
+
+import cv2
+import numpy as np
+
+from instarec.frames import SAD_BATCH
+from instarec.frames import extract_unique_frames
+
+SIZE = 128
+
+
+def _texture(level: int, seed: int) -> np.ndarray:
+    """Return a BGR frame of smooth noise around a brightness *level*."""
+    rng = np.random.default_rng(seed)
+    noise = cv2.GaussianBlur(rng.normal(0, 40, (SIZE, SIZE)), (0, 0), 3)
+    gray = np.clip(level + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def _write_video(path: str, frames: list[np.ndarray]) -> str:
+    """Write *frames* to an MJPEG AVI at 30 fps and return its path."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (SIZE, SIZE))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def _scenes(lengths: list[int]) -> list[np.ndarray]:
+    """Return static scenes of the given lengths, each a distinct brightness."""
+    frames: list[np.ndarray] = []
+    for number, length in enumerate(lengths):
+        frames += [_texture(40 + 50 * (number % 4), seed=number)] * length
+    return frames
+
+
+def test_static_video_keeps_only_first_frame(tmp_path):
+    video = _write_video(str(tmp_path / "static.avi"), _scenes([30]))
+    assert len(extract_unique_frames(video)) == 1
+
+
+def test_keeps_one_frame_per_scene(tmp_path):
+    video = _write_video(str(tmp_path / "scenes.avi"), _scenes([10, 12, 7, 15]))
+    assert len(extract_unique_frames(video)) == 4
+
+
+def test_cuts_on_batch_boundaries(tmp_path):
+    # Cuts land on the first frame of the second and third scoring batches,
+    # so they are only caught if the previous plane carries across batches
+    lengths = [SAD_BATCH, SAD_BATCH, 3]
+    video = _write_video(str(tmp_path / "boundary.avi"), _scenes(lengths))
+    assert len(extract_unique_frames(video)) == 3
+
+
+def test_pan_is_not_a_cut(tmp_path):
+    # Sustained motion gives a steady mafd of ~10 on every frame, well above the
+    # default threshold; differencing against the previous mafd (carried across
+    # batches) keeps it from scoring as a cut
+    rng = np.random.default_rng(0)
+    canvas = cv2.GaussianBlur(rng.normal(128, 60, (SIZE, SIZE * 8)), (0, 0), 2)
+    canvas = np.clip(canvas, 0, 255).astype(np.uint8)
+    frames = [
+        cv2.cvtColor(canvas[:, 8 * step : 8 * step + SIZE], cv2.COLOR_GRAY2BGR)
+        for step in range(90)
+    ]
+    video = _write_video(str(tmp_path / "pan.avi"), frames)
+    assert len(extract_unique_frames(video)) <= 2